@@ -1,4 +1,5 @@
-from typing import Generic, Optional, Tuple, Union
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Optional, Tuple, Union
 
 from eventsourcing.domain.model.entity import VersionedEntity
 from eventsourcing.domain.model.events import (
@@ -12,21 +13,31 @@ from eventsourcing.infrastructure.base import (
     AbstractRecordManager,
 )
 from eventsourcing.domain.model.repository import AbstractEntityRepository
-from eventsourcing.whitehead import IterableOfEvents, TEvent
+from eventsourcing.whitehead import ActualOccasion, IterableOfEvents, TEvent
 
 
 class PersistencePolicy(object):
     """
     Stores events of given type to given event store, whenever they are published.
+
+    If dedup_cache_size is given, up to that many recently stored events are
+    remembered by their type, originator ID and originator version, and events
+    equal to one of those are not stored again.
     """
 
     def __init__(
         self,
         event_store: AbstractEventStore,
         persist_event_type: Optional[Union[type, Tuple]] = None,
+        dedup_cache_size: int = 0,
     ):
         self.event_store = event_store
         self.persist_event_type = persist_event_type
+        self.dedup_cache_size = dedup_cache_size
+        self._is_persisted_type: Dict[type, bool] = {}
+        self._stored_events: "OrderedDict[Tuple[type, Any, Any], ActualOccasion]" = (
+            OrderedDict()
+        )
         subscribe(self.store_events, self.is_event)
 
     def close(self) -> None:
@@ -35,13 +46,60 @@ class PersistencePolicy(object):
     def is_event(self, events: IterableOfEvents) -> bool:
         if self.persist_event_type is None:
             return False
-        elif type(events) not in [list, tuple]:
+        elif type(events) not in (list, tuple):
             return False
         else:
-            return all(isinstance(e, self.persist_event_type) for e in events)
+            is_persisted_type = self._is_persisted_type
+            for e in events:
+                # Look up previously checked event classes in a dict,
+                # rather than checking each event with isinstance().
+                event_class = e.__class__
+                try:
+                    if not is_persisted_type[event_class]:
+                        return False
+                except KeyError:
+                    is_persisted = issubclass(event_class, self.persist_event_type)
+                    is_persisted_type[event_class] = is_persisted
+                    if not is_persisted:
+                        return False
+            return True
 
     def store_events(self, events: IterableOfEvents) -> None:
-        self.event_store.store_events(events)
+        if self.dedup_cache_size:
+            stored_events = self._stored_events
+            keyed_events = []
+            for e in events:
+                # Look up events by a cheap key, so that the (expensive)
+                # hash of a whole event is only computed to compare an
+                # event with a previously stored event that has that key.
+                key = (
+                    type(e),
+                    getattr(e, "originator_id", None),
+                    getattr(e, "originator_version", None),
+                )
+                stored = stored_events.get(key)
+                if stored is None or (stored is not e and stored != e):
+                    keyed_events.append((key, e))
+            if not keyed_events:
+                return
+            self.event_store.store_events([e for _, e in keyed_events])
+            for key, e in keyed_events:
+                stored_events[key] = e
+                stored_events.move_to_end(key)
+            while len(stored_events) > self.dedup_cache_size:
+                stored_events.popitem(last=False)
+        else:
+            self.event_store.store_events(events)
+
+    def handle(self, events: IterableOfEvents) -> None:
+        """
+        Stores given events, if they are of the type to be persisted.
+
+        Can be called directly, rather than publishing the events
+        to all the subscribers.
+        """
+        if self.is_event(events):
+            self.store_events(events)
 
 
 # Todo: Separate PeriodicSnapshottingPolicy from base class? Make usage more
@@ -1,6 +1,6 @@
 from abc import abstractmethod
 from decimal import Decimal
-from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Sequence, Tuple
 from uuid import UUID, uuid1
 
 from eventsourcing.domain.model.versioning import Upcastable
@@ -330,7 +330,24 @@ class LoggedEvent(DomainEvent[TEntity]):
 Predicate = Callable[[Sequence[TEvent]], bool]
 Handler = Callable[[Sequence[TEvent]], None]
 
-_subscriptions: List[Tuple[Optional[Predicate], Handler]] = []
+Subscription = Tuple[Optional[Predicate], Handler]
+
+# Subscriptions are the values of a dict, keyed by the subscription itself,
+# rather than items of a list, so that they can be found and removed without
+# scanning all the subscriptions. Subscriptions with an unhashable handler or
+# predicate are keyed by a new object, and are found by scanning instead. The
+# order of the keys is the order in which the subscriptions were made.
+_subscriptions: Dict[Hashable, Subscription] = {}
+
+
+def _find_subscription_key(subscription: Subscription) -> Optional[Hashable]:
+    try:
+        return subscription if subscription in _subscriptions else None
+    except TypeError:
+        for key, value in _subscriptions.items():
+            if value == subscription:
+                return key
+        return None
 
 
 def subscribe(handler: Handler, predicate: Optional[Predicate] = None) -> None:
@@ -344,8 +361,14 @@ def subscribe(handler: Handler, predicate: Optional[Predicate] = None) -> None:
     :param callable handler: Will be called when an event is published.
     :param callable predicate: Conditions whether the handler will be called.
     """
-    if (predicate, handler) not in _subscriptions:
-        _subscriptions.append((predicate, handler))
+    subscription = (predicate, handler)
+    if _find_subscription_key(subscription) is None:
+        try:
+            hash(subscription)
+        except TypeError:
+            _subscriptions[object()] = subscription
+        else:
+            _subscriptions[subscription] = subscription
 
 
 def unsubscribe(handler: Handler, predicate: Optional[Predicate] = None) -> None:
@@ -356,8 +379,9 @@ def unsubscribe(handler: Handler, predicate: Optional[Predicate] = None) -> None
     :param callable handler: Previously subscribed handler.
     :param callable predicate: Previously subscribed predicate.
     """
-    if (predicate, handler) in _subscriptions:
-        _subscriptions.remove((predicate, handler))
+    key = _find_subscription_key((predicate, handler))
+    if key is not None:
+        del _subscriptions[key]
 
 
 def publish(events: Sequence[TEvent]) -> None:
@@ -373,7 +397,7 @@ def publish(events: Sequence[TEvent]) -> None:
     # A cache of conditions means predicates aren't evaluated
     # more than once for each event.
     cache: Dict[Predicate, bool] = {}
-    for predicate, handler in _subscriptions[:]:
+    for predicate, handler in list(_subscriptions.values()):
         if predicate is None:
             handler(events)
         else:
@@ -399,7 +423,7 @@ def assert_event_handlers_empty() -> None:
     there are no event handlers subscribed.
     """
     if len(_subscriptions):
-        msg = "subscriptions still exist: %s" % _subscriptions
+        msg = "subscriptions still exist: %s" % list(_subscriptions.values())
         raise EventHandlersNotEmptyError(msg)
 
 
@@ -1,5 +1,7 @@
 import datetime
 from decimal import Decimal
+from functools import lru_cache
+from time import gmtime
 from typing import Optional, Any, Union
 from uuid import UUID, uuid5
 
@@ -14,11 +16,7 @@ from eventsourcing.domain.model.events import (
 )
 from eventsourcing.exceptions import RepositoryKeyError
 from eventsourcing.domain.model.repository import AbstractEntityRepository
-from eventsourcing.utils.times import (
-    datetime_from_timestamp,
-    decimaltimestamp,
-    utc_timezone,
-)
+from eventsourcing.utils.times import decimaltimestamp, utc_timezone
 from eventsourcing.utils.topic import get_topic
 
 Namespace_Timebuckets = UUID("0d7ee297-a976-4c29-91ff-84ffc79d8155")
@@ -39,6 +37,31 @@ BUCKET_SIZES = {
     "second": ONE_SECOND,
 }
 
+# Plural names of bucket sizes (e.g. "years") resolve to the canonical names.
+BUCKET_SIZE_NAMES = {name: name for name in BUCKET_SIZES}
+BUCKET_SIZE_NAMES.update({name + "s": name for name in BUCKET_SIZES})
+
+# Functions that format a bucket boundary from a time.struct_time.
+BUCKET_ID_FORMATTERS = {
+    "year": lambda t: "%04d" % t.tm_year,
+    "month": lambda t: "%04d-%02d" % t[:2],
+    "day": lambda t: "%04d-%02d-%02d" % t[:3],
+    "hour": lambda t: "%04d-%02d-%02d_%02d" % t[:4],
+    "minute": lambda t: "%04d-%02d-%02d_%02d-%02d" % t[:5],
+    "second": lambda t: "%04d-%02d-%02d_%02d-%02d-%02d" % t[:6],
+}
+
+# Lengths in seconds of buckets that start at a whole multiple of their length.
+BUCKET_SECONDS = {"day": 86400, "hour": 3600, "minute": 60, "second": 1}
+
+# Functions that select datetime args of bucket start from a time.struct_time.
+BUCKET_START_FIELDS = {
+    "year": lambda t: (t.tm_year, 1, 1),
+    "month": lambda t: (t.tm_year, t.tm_mon, 1),
+}
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=utc_timezone)
+
 
 class Timebucketedlog(TimestampedVersionedEntity):
     class Event(TimestampedVersionedEntity.Event):
@@ -123,28 +146,16 @@ class MessageLogged(EventWithTimestamp, EventWithOriginatorID, LoggedEvent):
 def make_timebucket_id(
     log_id: UUID, timestamp: Union[Decimal, float], bucket_size: str
 ) -> UUID:
-    d = datetime_from_timestamp(timestamp)
-
-    assert isinstance(d, datetime.datetime)
-    if bucket_size.startswith("year"):
-        boundary = "{:04}".format(d.year)
-    elif bucket_size.startswith("month"):
-        boundary = "{:04}-{:02}".format(d.year, d.month)
-    elif bucket_size.startswith("day"):
-        boundary = "{:04}-{:02}-{:02}".format(d.year, d.month, d.day)
-    elif bucket_size.startswith("hour"):
-        boundary = "{:04}-{:02}-{:02}_{:02}".format(d.year, d.month, d.day, d.hour)
-    elif bucket_size.startswith("minute"):
-        boundary = "{:04}-{:02}-{:02}_{:02}-{:02}".format(
-            d.year, d.month, d.day, d.hour, d.minute
-        )
-    elif bucket_size.startswith("second"):
-        boundary = "{:04}-{:02}-{:02}_{:02}-{:02}-{:02}".format(
-            d.year, d.month, d.day, d.hour, d.minute, d.second
-        )
-    else:
-        raise ValueError("Bucket size not supported: {}".format(bucket_size))
-    return uuid5(Namespace_Timebuckets, log_id.hex + "_" + boundary)
+    format_boundary = BUCKET_ID_FORMATTERS[resolve_bucket_size(bucket_size)]
+    boundary = format_boundary(gmtime(round_timestamp(timestamp)))
+    return timebucket_id_from_name(log_id.hex + "_" + boundary)
+
+
+@lru_cache(maxsize=1024)
+def timebucket_id_from_name(name: str) -> UUID:
+    # Successive messages in a log mostly fall in the same bucket,
+    # so remember recent IDs rather than rehashing the same name.
+    return uuid5(Namespace_Timebuckets, name)
 
 
 def next_bucket_starts(timestamp: float, bucket_size: str) -> float:
@@ -160,44 +171,42 @@ def previous_bucket_starts(timestamp: float, bucket_size: str) -> float:
 
 
 def bucket_starts(timestamp: float, bucket_size: str) -> datetime.datetime:
-    dt = datetime_from_timestamp(timestamp)
-    assert isinstance(dt, datetime.datetime)
-    if bucket_size.startswith("year"):
-        return datetime.datetime(dt.year, 1, 1, tzinfo=utc_timezone)
-    elif bucket_size.startswith("month"):
-        return datetime.datetime(dt.year, dt.month, 1, tzinfo=utc_timezone)
-    elif bucket_size.startswith("day"):
-        return datetime.datetime(dt.year, dt.month, dt.day, tzinfo=utc_timezone)
-    elif bucket_size.startswith("hour"):
-        return datetime.datetime(
-            dt.year, dt.month, dt.day, dt.hour, tzinfo=utc_timezone
-        )
-    elif bucket_size.startswith("minute"):
-        return datetime.datetime(
-            dt.year, dt.month, dt.day, dt.hour, dt.minute, tzinfo=utc_timezone
-        )
-    elif bucket_size.startswith("second"):
-        return datetime.datetime(
-            dt.year,
-            dt.month,
-            dt.day,
-            dt.hour,
-            dt.minute,
-            dt.second,
-            tzinfo=utc_timezone,
-        )
-    else:
-        raise ValueError("Bucket size not supported: {}".format(bucket_size))
+    bucket_size = resolve_bucket_size(bucket_size)
+    timestamp = round_timestamp(timestamp)
+    bucket_seconds = BUCKET_SECONDS.get(bucket_size)
+    if bucket_seconds is not None:
+        seconds = int(timestamp // bucket_seconds) * bucket_seconds
+        return EPOCH + datetime.timedelta(seconds=seconds)
+    select_fields = BUCKET_START_FIELDS[bucket_size]
+    return datetime.datetime(*select_fields(gmtime(timestamp)), tzinfo=utc_timezone)
+
+
+def round_timestamp(timestamp: Union[Decimal, float]) -> float:
+    # Round to the nearest microsecond, as datetime does, so that a timestamp
+    # just before a boundary is in the same bucket as its datetime would be.
+    return round(float(timestamp), 6)
+
+
+def resolve_bucket_size(bucket_size: str) -> str:
+    """
+    Returns the supported bucket size named by given bucket size,
+    which may be a canonical name (e.g. "year"), its plural (e.g.
+    "years"), or otherwise start with a canonical name.
+    """
+    name = BUCKET_SIZE_NAMES.get(bucket_size)
+    if name is not None:
+        return name
+    for name in BUCKET_SIZES:
+        if bucket_size.startswith(name):
+            return name
+    raise ValueError(
+        "Bucket size not supported: {}. Must be one of: {}"
+        "".format(bucket_size, BUCKET_SIZES.keys())
+    )
 
 
 def bucket_duration(bucket_size: str) -> relativedelta:
-    try:
-        return BUCKET_SIZES[bucket_size]
-    except KeyError:
-        raise ValueError(
-            "Bucket size not supported: {}. Must be one of: {}"
-            "".format(bucket_size, BUCKET_SIZES.keys())
-        )
+    return BUCKET_SIZES[resolve_bucket_size(bucket_size)]
 
 
 # Todo: Move to general utils?
@@ -1,7 +1,9 @@
 import multiprocessing
 from multiprocessing import Manager
+from multiprocessing.connection import wait
 from queue import Queue, Empty
-from time import sleep
+from threading import Thread
+from time import monotonic
 from typing import (
     Sequence,
     Optional,
@@ -13,7 +15,10 @@ from typing import (
     Type,
 )
 
-from eventsourcing.application.notificationlog import RecordManagerNotificationLog
+from eventsourcing.application.notificationlog import (
+    AbstractNotificationLog,
+    RecordManagerNotificationLog,
+)
 from eventsourcing.application.process import (
     PromptToQuit,
     ProcessApplication,
@@ -36,6 +41,8 @@ from eventsourcing.infrastructure.base import DEFAULT_PIPELINE_ID
 from eventsourcing.system.definition import AbstractSystemRunner, System
 from eventsourcing.system.runner import DEFAULT_POLL_INTERVAL, PromptOutbox
 
+PROMPT_COALESCE_INTERVAL = 0.01
+
 
 class MultiprocessRunner(AbstractSystemRunner):
     def __init__(
@@ -66,14 +73,17 @@ class MultiprocessRunner(AbstractSystemRunner):
         self.inboxes = {}
         self.outboxes = {}
 
+        # Lower-case each process name once, rather than per pipeline.
+        lower_names = {name: name.lower() for name in self.system.process_classes}
+
         # Setup queues.
         for pipeline_id in self.pipeline_ids:
             for process_name, upstream_names in self.system.upstream_names.items():
-                inbox_id = (pipeline_id, process_name.lower())
+                inbox_id = (pipeline_id, lower_names[process_name])
                 if inbox_id not in self.inboxes:
                     self.inboxes[inbox_id] = self.manager.Queue()
                 for upstream_class_name in upstream_names:
-                    outbox_id = (pipeline_id, upstream_class_name.lower())
+                    outbox_id = (pipeline_id, lower_names[upstream_class_name])
                     if outbox_id not in self.outboxes:
                         self.outboxes[outbox_id] = PromptOutbox()
                     if inbox_id not in self.outboxes[outbox_id].downstream_inboxes:
@@ -104,8 +114,12 @@ class MultiprocessRunner(AbstractSystemRunner):
         for pipeline_id in self.pipeline_ids:
             for process_name, upstream_names in self.system.upstream_names.items():
                 process_class = self.system.process_classes[process_name]
-                inbox = self.inboxes[(pipeline_id, process_name.lower())]
-                outbox = self.outboxes.get((pipeline_id, process_name.lower()))
+                inbox = self.inboxes[(pipeline_id, lower_names[process_name])]
+                outbox = self.outboxes.get((pipeline_id, lower_names[process_name]))
+                if self.setup_tables and not expect_tables_exist:
+                    is_ready = multiprocessing.Event()
+                else:
+                    is_ready = None
                 os_process = OperatingSystemProcess(
                     application_process_class=process_class,
                     infrastructure_class=self.infrastructure_class,
@@ -115,13 +129,16 @@ class MultiprocessRunner(AbstractSystemRunner):
                     setup_tables=self.setup_tables,
                     inbox=inbox,
                     outbox=outbox,
+                    is_ready=is_ready,
                 )
                 os_process.daemon = True
                 os_process.start()
                 self.os_processes.append(os_process)
-                if self.setup_tables and not expect_tables_exist:
-                    # Avoid conflicts when creating tables.
-                    sleep(self.sleep_for_setup_tables)
+                if is_ready is not None:
+                    # Avoid conflicts when creating tables, by waiting
+                    # (at most for sleep_for_setup_tables) until the first
+                    # process has constructed its application.
+                    is_ready.wait(timeout=self.sleep_for_setup_tables)
                     expect_tables_exist = True
 
         # Construct process applications in local process.
@@ -142,12 +159,19 @@ class MultiprocessRunner(AbstractSystemRunner):
         for os_process in self.os_processes:
             os_process.inbox.put(PromptToQuit())
 
-        for os_process in self.os_processes:
-            os_process.join(timeout=10)
+        # Wait for the processes to exit, waking as soon as any of them
+        # does, with one deadline shared by all the processes.
+        deadline = monotonic() + 10
+        remaining = list(self.os_processes)
+        while remaining:
+            timeout = deadline - monotonic()
+            if timeout <= 0:
+                break
+            wait([p.sentinel for p in remaining], timeout=timeout)
+            remaining = [p for p in remaining if p.is_alive()]
 
-        for os_process in self.os_processes:
-            if os_process.is_alive():
-                os_process.terminate()
+        for os_process in remaining:
+            os_process.terminate()
 
         self.os_processes.clear()
 
@@ -163,6 +187,7 @@ class OperatingSystemProcess(multiprocessing.Process):
         pipeline_id: int = DEFAULT_PIPELINE_ID,
         poll_interval: int = DEFAULT_POLL_INTERVAL,
         setup_tables: bool = False,
+        is_ready: Optional[Any] = None,
         *args: Any,
         **kwargs: Any
     ):
@@ -176,6 +201,9 @@ class OperatingSystemProcess(multiprocessing.Process):
         self.inbox = inbox
         self.outbox = outbox
         self.setup_tables = setup_tables
+        self.is_ready = is_ready
+        self.pending_prompts: Dict[str, PromptToPull] = {}
+        self.prompts_last_flushed = float("-inf")
 
     def run(self) -> None:
         # Construct process application class.
@@ -191,9 +219,21 @@ class OperatingSystemProcess(multiprocessing.Process):
             pipeline_id=self.pipeline_id, setup_table=self.setup_tables
         )
 
+        # Signal that the application (and its tables) now exist.
+        if self.is_ready is not None:
+            self.is_ready.set()
+
         # Follow upstream notification logs.
+        record_manager = self.process.event_store.record_manager
+        section_size = self.process.notification_log_section_size
+        notification_logs: Dict[str, AbstractNotificationLog] = {}
         for upstream_name in self.upstream_names:
 
+            # Pipeline expressions can repeat an edge, so avoid
+            # constructing and following the same log twice.
+            if upstream_name in notification_logs:
+                continue
+
             # Obtain a notification log object (local or remote) for the upstream
             # process.
             if upstream_name == self.process.name:
@@ -208,8 +248,6 @@ class OperatingSystemProcess(multiprocessing.Process):
                 # to use a remote notification log, and upstream would need to provide
                 # an API from which we can pull. It's not unreasonable to have a fixed
                 # number of application processes connecting to the same database.
-                record_manager = self.process.event_store.record_manager
-
                 notification_log = RecordManagerNotificationLog(
                     record_manager=record_manager.clone(
                         application_name=upstream_name,
@@ -217,7 +255,7 @@ class OperatingSystemProcess(multiprocessing.Process):
                         #  same?).
                         pipeline_id=self.pipeline_id,
                     ),
-                    section_size=self.process.notification_log_section_size,
+                    section_size=section_size,
                 )
                 # Todo: Support upstream partition IDs different from self.pipeline_id?
                 # Todo: Support combining partitions. Read from different partitions
@@ -251,10 +289,17 @@ class OperatingSystemProcess(multiprocessing.Process):
 
             # Make the process follow the upstream notification log.
             self.process.follow(upstream_name, notification_log)
+            notification_logs[upstream_name] = notification_log
 
         # Subscribe to broadcast prompts published by the process application.
         subscribe(handler=self.broadcast_prompt, predicate=is_prompt_to_pull)
 
+        # Receive prompts from the inbox in a separate thread, so that getting
+        # prompts from the manager process overlaps with running the process.
+        self.prompts: Queue = Queue()
+        inbox_reader = Thread(target=self.read_inbox, daemon=True)
+        inbox_reader.start()
+
         try:
             self.loop_on_prompts()
         finally:
@@ -266,32 +311,95 @@ class OperatingSystemProcess(multiprocessing.Process):
         # Run once, in case prompts were missed.
         self.run_process()
 
+        # Bind methods used on every iteration. Nothing joins the
+        # queue of prompts, so task_done() isn't called.
+        get = self.prompts.get
+        get_nowait = self.prompts.get_nowait
+        run_process = self.run_process
+        poll_interval = self.poll_interval
+
         # Loop on getting prompts.
         while True:
             try:
                 # Todo: Make the poll interval gradually increase if there are only
                 #  timeouts?
-                item = self.inbox.get(timeout=self.poll_interval)
-                self.inbox.task_done()
-
-                if isinstance(item, PromptToQuit):
-                    self.process.close()
-                    break
-
-                elif isinstance(item, PromptToPull):
-                    self.run_process(item)
-
-                else:
-                    raise ProgrammingError("Unsupported prompt: {}".format(item))
+                item = get(timeout=poll_interval)
 
             except Empty:
                 # Basically, we're polling after a timeout.
-                self.run_process()
+                run_process()
+
+            else:
+                # Drain the inbox, so that a burst of prompts from the
+                # same upstream process results in only one run.
+                prompts: Dict[str, PromptToPull] = {}
+                is_quitting = False
+                while True:
+                    if isinstance(item, PromptToQuit):
+                        # Run the prompts received before quitting.
+                        is_quitting = True
+                        break
+
+                    elif isinstance(item, PromptToPull):
+                        prompts[item.process_name] = item
+
+                    elif isinstance(item, Exception):
+                        # Error from the thread reading the inbox.
+                        raise item
+
+                    else:
+                        raise ProgrammingError("Unsupported prompt: {}".format(item))
+
+                    try:
+                        item = get_nowait()
+                    except Empty:
+                        break
+
+                for prompt in prompts.values():
+                    run_process(prompt)
+
+                if is_quitting:
+                    self.process.close()
+                    return
+
+    def read_inbox(self) -> None:
+        # The inbox is a manager proxy, and nothing joins it, so task_done()
+        # isn't called (each call would be another round trip to the manager).
+        while True:
+            try:
+                item = self.inbox.get()
+            except Exception as e:
+                # For example, EOFError if the manager process has gone away.
+                # Pass the error to the main thread, which raises it, so the
+                # process ends rather than waiting for prompts indefinitely.
+                self.prompts.put(e)
+                break
+            self.prompts.put(item)
+            if isinstance(item, PromptToQuit):
+                break
 
     @retry((OperationalError, RecordConflictError), max_attempts=100, wait=0.1)
     def run_process(self, prompt: Optional[Prompt] = None) -> None:
-        self.process.run(prompt)
+        try:
+            self.process.run(prompt)
+        finally:
+            self.flush_prompts()
 
     def broadcast_prompt(self, prompt: PromptToPull) -> None:
         if self.outbox is not None:
-            self.outbox.put(prompt)
+            # Coalesce the prompts published whilst running the process
+            # (one for each upstream event that resulted in new events),
+            # sending at most one every PROMPT_COALESCE_INTERVAL, with any
+            # remaining prompt being sent when the run has finished.
+            self.pending_prompts[prompt.process_name] = prompt
+            if monotonic() - self.prompts_last_flushed > PROMPT_COALESCE_INTERVAL:
+                self.flush_prompts()
+
+    def flush_prompts(self) -> None:
+        if self.pending_prompts:
+            assert self.outbox is not None
+            pending_prompts = self.pending_prompts
+            self.pending_prompts = {}
+            for prompt in pending_prompts.values():
+                self.outbox.put(prompt)
+        self.prompts_last_flushed = monotonic()
@@ -1,10 +1,16 @@
-import datetime
 import os
 import traceback
-from queue import Empty, Queue
+from queue import Empty, Full, Queue
 from threading import Event, Lock, Thread
-from time import sleep
-from typing import Dict, Optional, Tuple, Type
+from time import monotonic, sleep
+from typing import Callable, Dict, Optional, Tuple, Type
+
+try:
+    from queue import SimpleQueue
+except ImportError:
+    # Python 3.6 doesn't have SimpleQueue.
+    SimpleQueue = Queue  # type: ignore
+# Todo: Delete above try/except when dropping support for Python 3.6.
 
 import ray
 
@@ -34,10 +40,14 @@ ray.init(**ray_init_kwargs)
 
 MAX_QUEUE_SIZE = 1
 PAGE_SIZE = 20
+MAX_PAGE_SIZE = 1000
+EVENTS_BATCH_SIZE = 32
 MICROSLEEP = 0.000
 PROMPT_WITH_NOTIFICATION_IDS = False
 PROMPT_WITH_NOTIFICATION_OBJS = False
 GREEDY_PULL_NOTIFICATIONS = True
+# Set this environment variable to print timechecks of process activities.
+TRACE_ENV_VAR_NAME = "RAY_EVENTSOURCING_TRACE"
 
 
 class RayRunner(AbstractSystemRunner):
@@ -89,6 +99,10 @@ class RayRunner(AbstractSystemRunner):
         if db_uri is not None:
             env_vars["DB_URI"] = db_uri
 
+        trace = os.environ.get(TRACE_ENV_VAR_NAME)
+        if trace:
+            env_vars[TRACE_ENV_VAR_NAME] = trace
+
         # Start processes.
         for pipeline_id in self.pipeline_ids:
             for process_name, process_class in self.system.process_classes.items():
@@ -134,8 +148,25 @@ class RayRunner(AbstractSystemRunner):
 
     def close(self):
         super(RayRunner, self).close()
-        for process in self.ray_processes.values():
-            process.stop.remote()
+        pending = [process.stop.remote() for process in self.ray_processes.values()]
+
+        # Wait for the processes to stop, for as long as some are stopping.
+        stopped = []
+        while pending:
+            ready, pending = ray.wait(pending, num_returns=len(pending), timeout=1.0)
+            if not ready:
+                print("Continuing after %d processes didn't stop" % len(pending))
+                break
+            stopped += ready
+
+        # Raise any errors from the downstream processes in response to the
+        # last prompts pushed by the stopped processes.
+        prompt_response_ids = [i for ids in ray.get(stopped) for i in ids]
+        if prompt_response_ids:
+            ready, _ = ray.wait(
+                prompt_response_ids, num_returns=len(prompt_response_ids), timeout=1.0
+            )
+            ray.get(ready)
 
 
 @ray.remote
@@ -158,16 +189,24 @@ class RayProcess:
         self.setup_tables = setup_tables
         if env_vars is not None:
             os.environ.update(env_vars)
+        self.is_tracing = bool(os.environ.get(TRACE_ENV_VAR_NAME))
 
         # Setup threads, queues, and threading events.
         self.readers_lock = Lock()
         self._has_been_prompted = Event()
         self.heads_lock = Lock()
         self.heads = {}
+        self._is_processing_prompts = False
+        self._processing_heads = {}
         self.positions_lock = Lock()
         self.positions = {}
         self.positions_initialised = Event()
-        self.db_jobs_queue = Queue(maxsize=MAX_QUEUE_SIZE)
+        self.page_sizes = {}
+        self._caught_up_names = set()
+        # Each thread that puts a DB job waits for it to be done, so the DB
+        # jobs queue doesn't need a maxsize, and can be a (faster) SimpleQueue.
+        self.db_jobs_queue = SimpleQueue()
+        self._db_jobs_pool = []
         self.upstream_event_queue = Queue(maxsize=MAX_QUEUE_SIZE)
         self.downstream_prompt_queue = Queue()  # no maxsize, call() can put prompt
 
@@ -190,13 +229,14 @@ class RayProcess:
 
         self._notification_rayids = {}
         self._prompted_notifications = {}
+        self._method_cache: Dict[str, Callable] = {}
+        self._pending_prompt_response_ids = []
 
     def db_jobs(self):
         # print("Running do_jobs")
         while not self.has_been_stopped.is_set():
             try:
                 item = self.db_jobs_queue.get()  # timeout=1)
-                self.db_jobs_queue.task_done()
             except Empty:
                 if self.has_been_stopped.is_set():
                     break
@@ -219,18 +259,39 @@ class RayProcess:
 
     @retry((OperationalError, RecordConflictError), max_attempts=100, wait=0.01)
     def do_db_job(self, method, args, kwargs):
-        db_job = RayDbJob(method, args=args, kwargs=kwargs)
+        # Reuse a job that is done, rather than constructing a new one.
+        try:
+            db_job = self._db_jobs_pool.pop()
+        except IndexError:
+            db_job = RayDbJob(method, args=args, kwargs=kwargs)
+        else:
+            db_job.reset(method, args, kwargs)
         self.db_jobs_queue.put(db_job)
         db_job.wait()
 
         if db_job.error:
+            # Not reused, the DB jobs thread may still be checking the error.
             raise db_job.error
 
         # self.print_timecheck("db job delay:", db_job.delay)
         # self.print_timecheck("db job duration:", db_job.duration)
 
         # self.print_timecheck('db job result:', db_job.result)
-        return db_job.result
+        result = db_job.result
+        db_job.release()
+        self._db_jobs_pool.append(db_job)
+        return result
+
+    @retry((OperationalError, RecordConflictError), max_attempts=100, wait=0.01)
+    def do_db_read(self, method, args, kwargs):
+        """
+        Calls given method directly, in the calling thread.
+
+        Reads don't need to be ordered with the writes done by the DB jobs
+        thread, so avoid the hand-off to and from the DB jobs thread.
+        """
+        with self.readers_lock:
+            return method(*args, **kwargs)
 
     def init(self, upstream_processes: dict, downstream_processes: dict) -> None:
         """
@@ -240,6 +301,11 @@ class RayProcess:
         """
         self.upstream_processes = upstream_processes
         self.downstream_processes = downstream_processes
+        # Remote methods used to pull notifications from upstream processes.
+        self.upstream_get_notifications = {
+            upstream_name: upstream_process.get_notifications
+            for upstream_name, upstream_process in upstream_processes.items()
+        }
 
         # Subscribe to broadcast prompts published by the process application.
         subscribe(handler=self._enqueue_prompt_to_pull, predicate=is_prompt_to_pull)
@@ -287,7 +353,11 @@ class RayProcess:
         assert self.positions_initialised.is_set(), "Please call .init() first"
         # print("Calling", method_name, args, kwargs)
         if self.process:
-            method = getattr(self.process, method_name)
+            try:
+                method = self._method_cache[method_name]
+            except KeyError:
+                method = getattr(self.process, method_name)
+                self._method_cache[method_name] = method
             return self.do_db_job(method, args, kwargs)
         else:
             raise Exception(
@@ -310,13 +380,17 @@ class RayProcess:
         if latest_head is not None:
             with self.heads_lock:
                 # Update head from prompt.
+                # Whilst prompts are being processed, just update the head,
+                # the prompts thread checks the heads when it has finished.
                 if upstream_name in self.heads:
                     if latest_head > self.heads[upstream_name]:
                         self.heads[upstream_name] = latest_head
-                        self._has_been_prompted.set()
+                        if not self._is_processing_prompts:
+                            self._has_been_prompted.set()
                 else:
                     self.heads[upstream_name] = latest_head
-                    self._has_been_prompted.set()
+                    if not self._is_processing_prompts:
+                        self._has_been_prompted.set()
         else:
             self._has_been_prompted.set()
 
@@ -333,10 +407,24 @@ class RayProcess:
                     print("Continuing after error in 'process prompts' thread:", e)
                     print()
                     sleep(1)
+            finally:
+                self._finish_processing_prompts()
+
+    def _finish_processing_prompts(self):
+        with self.heads_lock:
+            if self._is_processing_prompts:
+                self._is_processing_prompts = False
+                # Prompt again if heads were advanced during processing.
+                for upstream_name, head in self._processing_heads.items():
+                    if self.heads.get(upstream_name) != head:
+                        self._has_been_prompted.set()
+                        break
 
     def __process_prompts(self):
         # Wait until prompted.
         self._has_been_prompted.wait()
+        if self.has_been_stopped.is_set():
+            return
 
         # self.print_timecheck('has been prompted')
         current_heads = {}
@@ -345,21 +433,32 @@ class RayProcess:
             for upstream_name in self.upstream_processes.keys():
                 current_head = self.heads.get(upstream_name)
                 current_heads[upstream_name] = current_head
-
-        for upstream_name in self.upstream_processes.keys():
-
-            with self.positions_lock:
-                current_position = self.positions.get(upstream_name)
+            self._is_processing_prompts = True
+            self._processing_heads = current_heads
+
+        # Start pulling notifications from all the upstream processes before
+        # waiting for any of them, so that the latency of the calls overlaps.
+        # After the positions are initialised, only this thread uses them,
+        # so there is no need to acquire the positions lock.
+        positions = self.positions
+        pulls = []
+        for upstream_name, get_notifications in self.upstream_get_notifications.items():
+
+            current_position = positions.get(upstream_name)
             first_id = current_position + 1  # request the next one
 
             current_head = current_heads[upstream_name]
+            page_size = self.page_sizes.get(upstream_name, PAGE_SIZE)
             if current_head is None:
+                if upstream_name in self._caught_up_names:
+                    # Wait for a prompt with a head to pull towards.
+                    continue
                 last_id = None
             elif current_position < current_head:
                 if GREEDY_PULL_NOTIFICATIONS:
-                    last_id = first_id + PAGE_SIZE - 1
+                    last_id = first_id + page_size - 1
                 else:
-                    last_id = min(current_head, first_id + PAGE_SIZE - 1)
+                    last_id = min(current_head, first_id + page_size - 1)
             else:
                 # self.print_timecheck(
                 #     "Up to date with", upstream_name, current_position,
@@ -373,11 +472,10 @@ class RayProcess:
             #     upstream_name,
             #     "%s -> %s" % (first_id, last_id),
             # )
-            upstream_process = self.upstream_processes[upstream_name]
             # Works best without prompted head as last requested,
             # because there might be more notifications since.
-            # Todo: However, limit the number to avoid getting too many, and
-            #  if we got full quota, then get again.
+            # The page size is limited, and if we get a full page, then we
+            # get again, with a larger page size (see below).
 
             notifications = []
             if PROMPT_WITH_NOTIFICATION_IDS or PROMPT_WITH_NOTIFICATION_OBJS:
@@ -419,8 +517,23 @@ class RayProcess:
             if last_id is None or first_id <= last_id:
                 # self._print_timecheck("Pulling notifications", first_id, last_id,
                 # 'from', upstream_name)
-                rayid = upstream_process.get_notifications.remote(first_id, last_id)
-                _notifications = ray.get(rayid)
+                rayid = get_notifications.remote(first_id, last_id)
+            else:
+                rayid = None
+            pulls.append((upstream_name, notifications, rayid, page_size))
+
+        check_causal_dependencies = self.process.check_causal_dependencies
+        get_event_from_notification = self.process.get_event_from_notification
+
+        # Wait for all the pulled notifications together.
+        pulled = iter(ray.get([pull[2] for pull in pulls if pull[2] is not None]))
+
+        for upstream_name, notifications, rayid, page_size in pulls:
+            if rayid is not None:
+                _notifications = next(pulled)
+                if current_heads[upstream_name] is None:
+                    # Pulled all the notifications before being prompted.
+                    self._caught_up_names.add(upstream_name)
                 # self._print_timecheck("Pulled notifications", _notifications)
                 notifications += _notifications
 
@@ -429,26 +542,32 @@ class RayProcess:
             #     upstream_name
             # )
 
+            # Adapt the page size, so that a backlog is pulled in fewer,
+            # larger pages, and a process that is keeping up pulls small pages.
+            if len(notifications) >= page_size:
+                self.page_sizes[upstream_name] = min(MAX_PAGE_SIZE, page_size * 2)
+            else:
+                self.page_sizes[upstream_name] = max(PAGE_SIZE, page_size // 2)
+
             if len(notifications):
 
-                if len(notifications) == PAGE_SIZE:
+                if len(notifications) >= page_size:
                     # self._print_timecheck("Range limit reached, reprompting...")
                     self._has_been_prompted.set()
 
                 position = notifications[-1]["id"]
-                with self.positions_lock:
-                    current_position = self.positions[upstream_name]
-                    if current_position is None or position > current_position:
-                        self.positions[upstream_name] = position
+                current_position = positions[upstream_name]
+                if current_position is None or position > current_position:
+                    positions[upstream_name] = position
 
             queue_item = []
             for notification in notifications:
                 # Check causal dependencies.
-                self.process.check_causal_dependencies(
+                check_causal_dependencies(
                     upstream_name, notification.get("causal_dependencies")
                 )
                 # Get domain event from notification.
-                event = self.process.get_event_from_notification(notification)
+                event = get_event_from_notification(notification)
                 # self.print_timecheck("obtained event", event)
 
                 # Put domain event on the queue, for event processing.
@@ -463,7 +582,7 @@ class RayProcess:
 
         This is called by the "process prompts" thread of a downstream process.
         """
-        return self.do_db_job(
+        return self.do_db_read(
             self._get_notifications, (first_notification_id, last_notification_id), {}
         )
 
@@ -494,16 +613,30 @@ class RayProcess:
             if queue_item is None or self.has_been_stopped.is_set():
                 return
 
-            for (domain_event, notification_id, upstream_name) in queue_item:
-                # print("Processing upstream event:", (domain_event,
-                # notification_id, upstream_name))
-
-                new_events, new_records = (), ()
+            # Drain any further queued items, so the events can be
+            # processed with one hand-off to the DB jobs thread.
+            events = list(queue_item)
+            while len(events) < EVENTS_BATCH_SIZE:
+                try:
+                    queue_item = self.upstream_event_queue.get_nowait()
+                except Empty:
+                    break
+                self.upstream_event_queue.task_done()
+                if queue_item is None:
+                    return
+                events.extend(queue_item)
+
+            # Process the events in slices, so that calls to the process
+            # application aren't held up behind a large page of events,
+            # and downstream processes are prompted as the events are done.
+            for i in range(0, len(events), EVENTS_BATCH_SIZE):
+                batch = events[i : i + EVENTS_BATCH_SIZE]
+                results = []
                 while not self.has_been_stopped.is_set():
                     try:
-                        new_events, new_records = self.do_db_job(
-                            method=self.process.process_upstream_event,
-                            args=(domain_event, notification_id, upstream_name),
+                        self.do_db_job(
+                            method=self._process_upstream_events,
+                            args=(batch, results),
                             kwargs={},
                         )
                         break
@@ -518,54 +651,80 @@ class RayProcess:
                 if self.has_been_stopped.is_set():
                     return
 
-                # if new_events:
-                #     self._print_timecheck("new events", len(new_events), new_events)
-
-                notifications = ()
-                notification_ids = ()
-                notifiable_events = [e for e in new_events if e.__notifiable__]
-                if len(notifiable_events):
-                    if PROMPT_WITH_NOTIFICATION_IDS or PROMPT_WITH_NOTIFICATION_OBJS:
-                        record_manager = self.process.event_store.record_manager
-                        notification_id_name = record_manager.notification_id_name
-                        notifications = [
-                            record_manager.create_notification_from_record(record)
-                            for record in new_records
-                            if isinstance(
-                                getattr(record, notification_id_name, None), int
+                self._enqueue_prompts_for_results(results)
+        # sleep(0.1)
+
+    def _enqueue_prompts_for_results(self, results):
+        record_manager = self.process.event_store.record_manager
+        notification_id_name = record_manager.notification_id_name
+        create_notification = record_manager.create_notification_from_record
+
+        for new_events, new_records in results:
+            if self.has_been_stopped.is_set():
+                return
+
+            # if new_events:
+            #     self._print_timecheck("new events", len(new_events), new_events)
+
+            notifications = ()
+            notification_ids = ()
+            if any(e.__notifiable__ for e in new_events):
+                if PROMPT_WITH_NOTIFICATION_IDS or PROMPT_WITH_NOTIFICATION_OBJS:
+                    notifications = [
+                        create_notification(record)
+                        for record in new_records
+                        if isinstance(
+                            getattr(record, notification_id_name, None), int
+                        )
+                    ]
+                    if len(notifications):
+                        head_notification_id = notifications[-1]["id"]
+                        if PROMPT_WITH_NOTIFICATION_IDS:
+                            notification_ids = self._put_notifications_in_ray_object_store(
+                                notifications
                             )
-                        ]
-                        if len(notifications):
-                            head_notification_id = notifications[-1]["id"]
-                            if PROMPT_WITH_NOTIFICATION_IDS:
-                                notification_ids = self._put_notifications_in_ray_object_store(
-                                    notifications
-                                )
-                                # Clear the notifications, avoid sending with IDs.
-                                notifications = ()
-                        else:
-                            head_notification_id = self._get_max_notification_id()
+                            # Clear the notifications, avoid sending with IDs.
+                            notifications = ()
                     else:
                         head_notification_id = self._get_max_notification_id()
+                else:
+                    head_notification_id = self._get_max_notification_id()
 
-                    prompt = RayPrompt(
-                        self.process.name,
-                        self.process.pipeline_id,
-                        head_notification_id,
-                        notification_ids,
-                        notifications,
-                    )
+                prompt = RayPrompt(
+                    self.process.name,
+                    self.process.pipeline_id,
+                    head_notification_id,
+                    notification_ids,
+                    notifications,
+                )
 
-                    # self.print_timecheck(
-                    #     "putting prompt on downstream " "prompt queue",
-                    #     self.downstream_prompt_queue.qsize(),
-                    # )
-                    self.downstream_prompt_queue.put(prompt)
-                    sleep(MICROSLEEP)
-                    # self.print_timecheck(
-                    #     "put prompt on downstream prompt " "queue"
-                    # )
-        # sleep(0.1)
+                # self.print_timecheck(
+                #     "putting prompt on downstream " "prompt queue",
+                #     self.downstream_prompt_queue.qsize(),
+                # )
+                self.downstream_prompt_queue.put(prompt)
+                sleep(MICROSLEEP)
+                # self.print_timecheck(
+                #     "put prompt on downstream prompt " "queue"
+                # )
+
+    def _process_upstream_events(self, events, results):
+        """
+        Processes upstream events, appending the new events and new
+        records of each to given results.
+
+        Each event is processed in its own transaction, so if the DB
+        job is retried, processing continues after the events that
+        have already been processed. Stops early if the process has
+        been stopped.
+        """
+        process_upstream_event = self.process.process_upstream_event
+        for domain_event, notification_id, upstream_name in events[len(results) :]:
+            if self.has_been_stopped.is_set():
+                break
+            results.append(
+                process_upstream_event(domain_event, notification_id, upstream_name)
+            )
 
     def _put_notifications_in_ray_object_store(self, notifications):
         notification_ids = [(n["id"], ray.put(n)) for n in notifications]
@@ -586,40 +745,98 @@ class RayProcess:
                 sleep(1)
 
     def __push_prompts(self):
-        try:
-            item = self.downstream_prompt_queue.get()  # timeout=1)
-            self.downstream_prompt_queue.task_done()
-            # Todo: Instead, drain the queue and consolidate prompts.
-        except Empty:
-            self._print_timecheck(
-                "timed out getting item from downstream prompt " "queue"
-            )
+        item = self.downstream_prompt_queue.get()  # timeout=1)
+        self.downstream_prompt_queue.task_done()
+
+        # Drain the queue, so that prompts can be consolidated.
+        items = [item]
+        while True:
+            try:
+                item = self.downstream_prompt_queue.get_nowait()
+            except Empty:
+                break
+            else:
+                self.downstream_prompt_queue.task_done()
+                items.append(item)
+
+        if any(i is None for i in items) or self.has_been_stopped.is_set():
+            return
+
+        prompts = self._consolidate_prompts(items)
+
+        # self._print_timecheck('pushing prompt with', prompt.notification_ids)
+        prompt_response_ids = []
+        # self.print_timecheck("pushing prompts", prompt)
+        for prompt in prompts:
             if self.has_been_stopped.is_set():
-                return
-        else:
-            # self.print_timecheck("task done on downstream prompt queue")
-            if item is None or self.has_been_stopped.is_set():
-                return
-            elif isinstance(item, PromptToPull):
+                break
+            if len(self.downstream_processes) > 1:
+                # Serialize the prompt once for all the downstream processes.
+                prompt = ray.put(prompt)
+            for downstream_name, ray_process in self.downstream_processes.items():
+                prompt_response_ids.append(ray_process.prompt.remote(prompt))
+                # self._print_timecheck("pushed prompt to", downstream_name)
+
+        # Wait for the previously pushed prompts to be received, so pushing
+        # these prompts overlaps with receiving the previous ones, whilst
+        # still limiting how far ahead of the downstream processes we get.
+        pending = self._pending_prompt_response_ids
+        self._pending_prompt_response_ids = prompt_response_ids
+        received = []
+        while pending and not self.has_been_stopped.is_set():
+            ready, pending = ray.wait(pending, num_returns=len(pending), timeout=0.5)
+            received += ready
+        if self.has_been_stopped.is_set():
+            # Leave the responses to be checked after the process has stopped.
+            self._pending_prompt_response_ids = (
+                received + pending + prompt_response_ids
+            )
+        elif received:
+            # Raise any errors from the downstream processes.
+            ray.get(received)
+        # self._print_timecheck("pushed prompts")
+
+    def _consolidate_prompts(self, items):
+        """
+        Returns one RayPrompt for each upstream process and pipeline in
+        the given items, with the highest head notification ID, so that
+        each downstream process is prompted once for a batch of prompts.
+        """
+        prompts = {}
+        max_notification_id = None
+        for item in items:
+            if isinstance(item, PromptToPull):
                 if item.head_notification_id:
                     head_notification_id = item.head_notification_id
                 else:
-                    head_notification_id = self._get_max_notification_id()
-                prompt = RayPrompt(
+                    # Only query the max notification ID once per batch.
+                    if max_notification_id is None:
+                        max_notification_id = self._get_max_notification_id()
+                    head_notification_id = max_notification_id
+                item = RayPrompt(
                     self.process.name, self.process.pipeline_id, head_notification_id,
                 )
+            key = (item.process_name, item.pipeline_id)
+            latest = prompts.get(key)
+            if latest is None:
+                prompts[key] = item
             else:
-                prompt = item
-            # self._print_timecheck('pushing prompt with', prompt.notification_ids)
-            prompt_response_ids = []
-            # self.print_timecheck("pushing prompts", prompt)
-            for downstream_name, ray_process in self.downstream_processes.items():
-                prompt_response_ids.append(ray_process.prompt.remote(prompt))
-                if self.has_been_stopped.is_set():
-                    return
-                # self._print_timecheck("pushed prompt to", downstream_name)
-            ray.get(prompt_response_ids)
-            # self._print_timecheck("pushed prompts")
+                if latest.head_notification_id is None:
+                    head_notification_id = item.head_notification_id
+                elif item.head_notification_id is None:
+                    head_notification_id = latest.head_notification_id
+                else:
+                    head_notification_id = max(
+                        latest.head_notification_id, item.head_notification_id
+                    )
+                prompts[key] = RayPrompt(
+                    item.process_name,
+                    item.pipeline_id,
+                    head_notification_id,
+                    tuple(latest.notification_ids) + tuple(item.notification_ids),
+                    tuple(latest.notifications) + tuple(item.notifications),
+                )
+        return list(prompts.values())
 
     def _get_max_notification_id(self):
         """
@@ -627,7 +844,7 @@ class RayProcess:
         :return:
         """
         record_manager = self.process.event_store.record_manager
-        max_notification_id = self.do_db_job(
+        max_notification_id = self.do_db_read(
             record_manager.get_max_notification_id, (), {}
         )
         # self.print_timecheck("MAX NOTIFICATION ID in DB:", max_notification_id)
@@ -636,17 +853,39 @@ class RayProcess:
     def stop(self):
         """
         Stops the process.
+
+        Returns the IDs of the responses to the last prompts pushed to
+        the downstream processes, which haven't been checked for errors.
         """
         self.has_been_stopped.set()
+
+        # Wake the threads, which block on their queues without a timeout.
+        self.db_jobs_queue.put(None)
+        self.downstream_prompt_queue.put(None)
+        try:
+            self.upstream_event_queue.put_nowait(None)
+        except Full:
+            # The events thread is busy, and will see the stop event.
+            pass
+        self._has_been_prompted.set()
+
         self.process.close()
         unsubscribe(handler=self._enqueue_prompt_to_pull, predicate=is_prompt_to_pull)
 
+        # The responses can't be waited for here, because a downstream process
+        # that is stopping can't receive prompts until it has stopped.
+        self.push_prompts_thread.join(timeout=1)
+        prompt_response_ids = self._pending_prompt_response_ids
+        self._pending_prompt_response_ids = []
+        return prompt_response_ids
+
     def _print_timecheck(self, activity, *args):
-        # pass
+        if not self.is_tracing:
+            return
         process_name = self.application_process_class.__name__.lower()
         print(
             "Timecheck",
-            datetime.datetime.now(),
+            monotonic(),
             self.pipeline_id,
             process_name,
             activity,
@@ -1,20 +1,38 @@
 from datetime import datetime
-from threading import Event, Lock
+from threading import Event
 
 from eventsourcing.application.simple import Prompt
 
 
 class RayDbJob(object):
     def __init__(self, method, args, kwargs):
+        self.is_done = Event()
+        self.reset(method, args, kwargs)
+
+    def reset(self, method, args, kwargs):
+        """
+        Prepares job to call given method, so that a job
+        which is done can be used again.
+        """
         self.method = method
         self.args = args
         self.kwargs = kwargs
-        self.is_done = Event()
-        self.is_cancelled = Event()
+        self.is_done.clear()
         self.constructed = datetime.now()
+        self.started = None
         self.completed = None
+        self.result = None
         self.error = None
-        self.time_lock = Lock()
+
+    def release(self):
+        """
+        Drops references to the method, its args and its result,
+        so that a job which is done can be kept until it is reused.
+        """
+        self.method = None
+        self.args = ()
+        self.kwargs = {}
+        self.result = None
 
     def __repr__(self):
         return "RayDbJob(method=%s)" % self.method
@@ -391,6 +391,74 @@ class TestEvents(TestCase):
         # Check we can assert there are no event handlers subscribed.
         assert_event_handlers_empty()
 
+    def test_subscribe_unsubscribe_dont_compare_other_subscriptions(self):
+        # Check subscribing and unsubscribing find a subscription without
+        # comparing it with the other subscriptions, which would make
+        # subscribing and unsubscribing many handlers take quadratic time.
+        class CountingHandler(object):
+            eq_count = 0
+
+            def __call__(self, events):
+                pass
+
+            def __eq__(self, other):
+                CountingHandler.eq_count += 1
+                return self is other
+
+            def __hash__(self):
+                return id(self)
+
+        handlers = [CountingHandler() for _ in range(100)]
+        for handler in handlers:
+            subscribe(handler=handler)
+        for handler in handlers:
+            unsubscribe(handler=handler)
+        assert_event_handlers_empty()
+        self.assertEqual(0, CountingHandler.eq_count)
+
+    def test_subscribe_unsubscribe_unhashable_handler(self):
+        # Check handlers that can't be hashed can still be subscribed.
+        class UnhashableHandler(object):
+            __hash__ = None
+
+            def __init__(self):
+                self.calls = []
+
+            def __call__(self, events):
+                self.calls.append(events)
+
+            def __eq__(self, other):
+                return isinstance(other, UnhashableHandler)
+
+        event = mock.Mock()
+        handler1 = mock.Mock()
+        handler2 = UnhashableHandler()
+        handler3 = mock.Mock()
+        subscribe(handler=handler1)
+        subscribe(handler=handler2)
+        subscribe(handler=handler3)
+
+        # Check an equal subscription isn't made twice.
+        subscribe(handler=UnhashableHandler())
+
+        # Check handlers are called once, in the order they were subscribed.
+        calls = []
+        handler1.side_effect = lambda events: calls.append(handler1)
+        handler3.side_effect = lambda events: calls.append(handler3)
+        publish([event])
+        self.assertEqual([[event]], handler2.calls)
+        self.assertEqual([handler1, handler3], calls)
+
+        # Check an equal handler unsubscribes the subscription.
+        unsubscribe(handler=UnhashableHandler())
+        publish([event])
+        self.assertEqual([[event]], handler2.calls)
+        self.assertEqual(2, handler1.call_count)
+
+        unsubscribe(handler=handler1)
+        unsubscribe(handler=handler3)
+        assert_event_handlers_empty()
+
     def test_hash(self):
         entity_id1 = uuid4()
         event1 = Example.Created(
@@ -49,6 +49,98 @@ class TestPersistencePolicy(unittest.TestCase):
         self.assertEqual(1, self.event_store.store_events.call_count)
         self.event_store.store_events.assert_called_once_with([domain_event1])
 
+    def test_published_list_of_events_is_stored_in_one_call(self):
+        # Publish a list of versioned entity events.
+        entity_id = uuid4()
+        domain_events = [
+            VersionedEntity.Event(originator_id=entity_id, originator_version=i)
+            for i in range(10)
+        ]
+        publish(domain_events)
+
+        # Check the events were stored together.
+        self.event_store.store_events.assert_called_once_with(domain_events)
+
+    def test_mixed_stream_of_published_events(self):
+        entity_id = uuid4()
+        for i in range(1000):
+            publish(
+                [VersionedEntity.Event(originator_id=entity_id, originator_version=i)]
+            )
+            publish([TimestampedEntity.Event(originator_id=entity_id)])
+
+        # Check only the versioned entity events were stored.
+        self.assertEqual(1000, self.event_store.store_events.call_count)
+
+        # Check a list that isn't all of the persisted type isn't stored.
+        publish(
+            [
+                VersionedEntity.Event(originator_id=entity_id, originator_version=0),
+                TimestampedEntity.Event(originator_id=entity_id),
+            ]
+        )
+        self.assertEqual(1000, self.event_store.store_events.call_count)
+
+    def test_duplicate_publish_is_deduplicated(self):
+        event_store = mock.Mock(spec=AbstractEventStore)
+        policy = PersistencePolicy(
+            event_store=event_store,
+            persist_event_type=VersionedEntity.Event,
+            dedup_cache_size=2,
+        )
+        try:
+            entity_id = uuid4()
+            domain_events = [
+                VersionedEntity.Event(originator_id=entity_id, originator_version=i)
+                for i in range(3)
+            ]
+
+            # Publish the same event twice.
+            publish([domain_events[0]])
+            publish([domain_events[0]])
+
+            # Check the event was stored once.
+            event_store.store_events.assert_called_once_with([domain_events[0]])
+
+            # Check only new events in a list are stored.
+            publish(domain_events[:2])
+            self.assertEqual(2, event_store.store_events.call_count)
+            event_store.store_events.assert_called_with([domain_events[1]])
+
+            # Check the oldest event is forgotten when the cache is full.
+            publish([domain_events[2]])
+            publish([domain_events[0]])
+            self.assertEqual(4, event_store.store_events.call_count)
+            event_store.store_events.assert_called_with([domain_events[0]])
+
+            # Check a different event at a remembered version is stored.
+            other_event = VersionedEntity.Event(
+                originator_id=entity_id, originator_version=0, foo="bar"
+            )
+            publish([other_event])
+            self.assertEqual(5, event_store.store_events.call_count)
+            event_store.store_events.assert_called_with([other_event])
+        finally:
+            policy.close()
+
+    def test_handled_events_are_stored_without_publishing(self):
+        # Handle a versioned entity event.
+        entity_id = uuid4()
+        domain_event1 = VersionedEntity.Event(
+            originator_id=entity_id, originator_version=0
+        )
+        self.persistence_policy.handle([domain_event1])
+
+        # Check the events were stored.
+        self.event_store.store_events.assert_called_once_with([domain_event1])
+
+        # Handle a timestamped entity event (should be ignored).
+        domain_event2 = TimestampedEntity.Event(originator_id=entity_id)
+        self.persistence_policy.handle([domain_event2])
+
+        # Check store_events() has still only been called with the first event.
+        self.event_store.store_events.assert_called_once_with([domain_event1])
+
 
 class TestSnapshottingPolicy(unittest.TestCase):
     def setUp(self):
@@ -3,20 +3,26 @@ import os
 import sys
 import time
 import unittest
+from queue import Queue
+from threading import Event, Lock, Thread
 from time import sleep
-from unittest import skipIf
+from types import SimpleNamespace
+from unittest import mock, skipIf
 from uuid import UUID
 
 import ray
 
 from eventsourcing.application.popo import PopoApplication
+from eventsourcing.application.simple import PromptToPull
 from eventsourcing.application.sqlalchemy import SQLAlchemyApplication
 from eventsourcing.domain.model.events import (
     assert_event_handlers_empty,
     clear_event_handlers,
 )
+from eventsourcing.exceptions import RecordConflictError
 from eventsourcing.system.definition import System
 from eventsourcing.system.ray import (
+    EVENTS_BATCH_SIZE,
     RayProcess,
     RayRunner,
 )
@@ -294,3 +300,137 @@ class TestRayProcess(unittest.TestCase):
         # self.assertEqual(created_event_notification['id'], 1)
         # self.assertEqual(created_event_notification['originator_id'], order_id)
         # self.assertEqual(created_event_notification['originator_version'], 0)
+
+
+def construct_ray_process_object(**attributes):
+    """
+    Constructs an object of the class of the RayProcess actors, without
+    calling __init__(), so that its methods can be called directly, without
+    starting its threads or an actor.
+    """
+    process_class = RayProcess.__ray_metadata__.modified_class
+    ray_process = process_class.__new__(process_class)
+    ray_process.__dict__.update(attributes)
+    return ray_process
+
+
+class TestRayProcessEvents(unittest.TestCase):
+    def test_events_processed_once_after_record_conflicts(self):
+        # Conflict once in the first slice of events, and once in the second.
+        num_events = EVENTS_BATCH_SIZE + 10
+        conflicting_ids = {5, EVENTS_BATCH_SIZE + 2}
+        processed_ids = []
+
+        def process_upstream_event(domain_event, notification_id, upstream_name):
+            if notification_id in conflicting_ids:
+                conflicting_ids.remove(notification_id)
+                raise RecordConflictError()
+            processed_ids.append(notification_id)
+            return [], []
+
+        process = mock.Mock()
+        process.process_upstream_event.side_effect = process_upstream_event
+        ray_process = construct_ray_process_object(
+            process=process,
+            has_been_stopped=Event(),
+            db_jobs_queue=Queue(),
+            _db_jobs_pool=[],
+            upstream_event_queue=Queue(),
+        )
+        db_jobs_thread = Thread(target=ray_process.db_jobs, daemon=True)
+        db_jobs_thread.start()
+        try:
+            events = [(mock.Mock(), i, "orders") for i in range(1, num_events + 1)]
+            ray_process.upstream_event_queue.put(events)
+            ray_process._RayProcess__process_events()
+        finally:
+            ray_process.has_been_stopped.set()
+            ray_process.db_jobs_queue.put(None)
+            db_jobs_thread.join(timeout=1)
+
+        # Check the conflicts happened, and each event was processed once.
+        self.assertFalse(conflicting_ids)
+        self.assertEqual(list(range(1, num_events + 1)), processed_ids)
+
+
+class TestRayProcessPrompts(unittest.TestCase):
+    def test_consolidate_prompts(self):
+        get_max_notification_id = mock.Mock(return_value=7)
+        ray_process = construct_ray_process_object(
+            process=SimpleNamespace(name="reservations", pipeline_id=0),
+            _get_max_notification_id=get_max_notification_id,
+        )
+
+        prompts = ray_process._consolidate_prompts(
+            [
+                RayPrompt("orders", 0, 3, notification_ids=((3, "a"),)),
+                RayPrompt("orders", 0, 5, notification_ids=((5, "b"),)),
+                RayPrompt("orders", 0, 4),
+                RayPrompt("orders", 1, 2),
+                PromptToPull("reservations", 0),
+                PromptToPull("reservations", 0),
+            ]
+        )
+
+        # Check the prompts from each upstream are merged into one prompt,
+        # with the highest head, and all the notification IDs.
+        self.assertEqual(3, len(prompts))
+        self.assertEqual(("orders", 0, 5), self.get_prompt_args(prompts[0]))
+        self.assertEqual(((3, "a"), (5, "b")), prompts[0].notification_ids)
+        self.assertEqual(("orders", 1, 2), self.get_prompt_args(prompts[1]))
+        self.assertEqual(("reservations", 0, 7), self.get_prompt_args(prompts[2]))
+
+        # Check the max notification ID was queried once for the batch.
+        self.assertEqual(1, get_max_notification_id.call_count)
+
+    def get_prompt_args(self, prompt):
+        self.assertIsInstance(prompt, RayPrompt)
+        return prompt.process_name, prompt.pipeline_id, prompt.head_notification_id
+
+    def test_caught_up_upstream_is_not_pulled_until_prompted_with_new_head(self):
+        get_notifications = mock.Mock()
+        get_notifications.remote.side_effect = lambda first_id, last_id: ray.put([])
+        ray_process = construct_ray_process_object(
+            process=mock.Mock(),
+            upstream_processes={"orders": None},
+            upstream_get_notifications={"orders": get_notifications},
+            positions={"orders": 5},
+            page_sizes={},
+            heads={},
+            heads_lock=Lock(),
+            _caught_up_names=set(),
+            _has_been_prompted=Event(),
+            _is_processing_prompts=False,
+            _processing_heads={},
+            _notification_rayids={},
+            has_been_stopped=Event(),
+            upstream_event_queue=Queue(),
+        )
+
+        def process_prompts():
+            ray_process._RayProcess__process_prompts()
+            ray_process._finish_processing_prompts()
+
+        # Check an upstream is pulled before it has prompted with a head.
+        ray_process._has_been_prompted.set()
+        process_prompts()
+        get_notifications.remote.assert_called_once_with(6, None)
+        self.assertIn("orders", ray_process._caught_up_names)
+
+        # Check it isn't pulled again after it has caught up.
+        ray_process._has_been_prompted.set()
+        process_prompts()
+        self.assertEqual(1, get_notifications.remote.call_count)
+
+        # Check it isn't pulled after a prompt with the head already reached.
+        ray_process.prompt(RayPrompt("orders", 0, 5))
+        self.assertTrue(ray_process._has_been_prompted.is_set())
+        process_prompts()
+        self.assertEqual(1, get_notifications.remote.call_count)
+
+        # Check it is pulled after a prompt with a new head.
+        ray_process.prompt(RayPrompt("orders", 0, 8))
+        self.assertTrue(ray_process._has_been_prompted.is_set())
+        process_prompts()
+        self.assertEqual(2, get_notifications.remote.call_count)
+        self.assertEqual(6, get_notifications.remote.call_args[0][0])
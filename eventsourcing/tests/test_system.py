@@ -1,11 +1,15 @@
 import os
+from queue import Queue
+from threading import Thread
 from time import sleep, time
-from unittest import TestCase
+from unittest import TestCase, mock
 from uuid import uuid4
 
-from eventsourcing.system.multiprocess import MultiprocessRunner
+from eventsourcing.application.process import PromptToQuit
+from eventsourcing.application.simple import PromptToPull
+from eventsourcing.system.multiprocess import MultiprocessRunner, OperatingSystemProcess
 from eventsourcing.application.sqlalchemy import SQLAlchemyApplication
-from eventsourcing.system.runner import MultiThreadedRunner
+from eventsourcing.system.runner import MultiThreadedRunner, PromptOutbox
 from eventsourcing.system.definition import System
 from eventsourcing.domain.model.events import (
     assert_event_handlers_empty,
@@ -508,3 +512,110 @@ class TestSystem(TestCase):
             del os.environ["DB_URI"]
         except KeyError:
             pass
+
+
+class TestOperatingSystemProcess(TestCase):
+    def setUp(self):
+        # Construct an OS process object, without starting it.
+        self.downstream_inbox = Queue()
+        outbox = PromptOutbox()
+        outbox.downstream_inboxes["downstream"] = self.downstream_inbox
+        self.os_process = OperatingSystemProcess(
+            application_process_class=Orders,
+            infrastructure_class=None,
+            upstream_names=[],
+            inbox=Queue(),
+            outbox=outbox,
+        )
+        self.os_process.process = mock.Mock()
+
+    def get_downstream_prompts(self):
+        prompts = []
+        while not self.downstream_inbox.empty():
+            prompts.append(self.downstream_inbox.get_nowait())
+        return prompts
+
+    @mock.patch("eventsourcing.system.multiprocess.PROMPT_COALESCE_INTERVAL", 10)
+    def test_prompts_are_coalesced(self):
+        prompts = [PromptToPull("orders", 0, i) for i in range(1, 6)]
+
+        def run(prompt=None):
+            for p in prompts:
+                self.os_process.broadcast_prompt(p)
+
+        # Check the first prompt is sent at once, and quick
+        # prompts after it are sent as the last of them.
+        self.os_process.process.run.side_effect = run
+        self.os_process.run_process()
+        downstream_prompts = self.get_downstream_prompts()
+        self.assertEqual(2, len(downstream_prompts))
+        self.assertIs(prompts[0], downstream_prompts[0])
+        self.assertIs(prompts[-1], downstream_prompts[1])
+
+    @mock.patch("eventsourcing.system.multiprocess.PROMPT_COALESCE_INTERVAL", 10)
+    def test_last_prompt_is_sent_when_run_ends_with_error(self):
+        prompts = [PromptToPull("orders", 0, i) for i in range(1, 3)]
+
+        def run(prompt=None):
+            for p in prompts:
+                self.os_process.broadcast_prompt(p)
+            raise ValueError("Run failed")
+
+        # Check the last prompt is still sent when the run ends early.
+        self.os_process.process.run.side_effect = run
+        with self.assertRaises(ValueError):
+            self.os_process.run_process()
+        self.assertEqual(prompts, self.get_downstream_prompts())
+
+    @mock.patch("eventsourcing.system.multiprocess.PROMPT_COALESCE_INTERVAL", 10)
+    def test_last_prompt_is_sent_before_process_quits(self):
+        prompts = [PromptToPull("orders", 0, i) for i in range(1, 6)]
+
+        def run(prompt=None):
+            for p in prompts:
+                self.os_process.broadcast_prompt(p)
+
+        # Check the last prompt is sent when the process quits straight
+        # after running, before the coalesce interval has passed.
+        self.os_process.process.run.side_effect = run
+        self.os_process.prompts = Queue()
+        self.os_process.prompts.put(PromptToQuit())
+        self.os_process.loop_on_prompts()
+        self.os_process.process.close.assert_called_once_with()
+        self.assertEqual([prompts[0], prompts[-1]], self.get_downstream_prompts())
+
+    def test_inbox_error_is_raised_by_main_loop(self):
+        # Check an error getting a prompt from the inbox, for example if the
+        # manager process has gone away, stops the thread reading the inbox.
+        self.os_process.inbox = mock.Mock()
+        self.os_process.inbox.get.side_effect = EOFError()
+        self.os_process.prompts = Queue()
+        inbox_reader = Thread(target=self.os_process.read_inbox, daemon=True)
+        inbox_reader.start()
+        inbox_reader.join(timeout=1)
+        self.assertFalse(inbox_reader.is_alive())
+        self.assertEqual(1, self.os_process.inbox.get.call_count)
+
+        # Check the error is raised by the loop on prompts (rather than it
+        # getting the prompt to quit, which would end the loop otherwise).
+        self.os_process.prompts.put(PromptToQuit())
+        with self.assertRaises(EOFError):
+            self.os_process.loop_on_prompts()
+        self.os_process.process.close.assert_not_called()
+
+    def test_prompts_received_before_quit_are_run(self):
+        prompt1 = PromptToPull("orders", 0, 1)
+        prompt2 = PromptToPull("payments", 0, 1)
+        self.os_process.prompts = Queue()
+        self.os_process.prompts.put(prompt1)
+        self.os_process.prompts.put(prompt2)
+        self.os_process.prompts.put(PromptToQuit())
+
+        # Check the prompts drained with the prompt to quit are run
+        # (after the first run), before the process is closed.
+        self.os_process.loop_on_prompts()
+        self.assertEqual(
+            [mock.call.run(None), mock.call.run(prompt1), mock.call.run(prompt2)],
+            self.os_process.process.method_calls[:-1],
+        )
+        self.assertEqual(mock.call.close(), self.os_process.process.method_calls[-1])
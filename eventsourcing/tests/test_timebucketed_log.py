@@ -416,6 +416,44 @@ class TimebucketedlogTestCase(WithEventPersistence):
         with self.assertRaises(ValueError):
             bucket_duration(bucket_size="invalid")
 
+        # Check the helper methods accept plural bucket sizes.
+        timestamp = decimaltimestamp()
+        for bucket_size in ("year", "month", "day", "hour", "minute", "second"):
+            plural = bucket_size + "s"
+            self.assertEqual(
+                make_timebucket_id(log_id10, timestamp, bucket_size),
+                make_timebucket_id(log_id10, timestamp, plural),
+            )
+            self.assertEqual(
+                bucket_starts(timestamp, bucket_size), bucket_starts(timestamp, plural)
+            )
+            self.assertEqual(bucket_duration(bucket_size), bucket_duration(plural))
+
+
+    def test_bucket_boundaries_with_float_timestamps(self):
+        # Check timestamps less than half a microsecond before a boundary are
+        # rounded into the next bucket, as their datetime is, so a float gives
+        # the same bucket as the microsecond timestamp that was logged.
+        log_id = uuid4()
+        for timestamp, boundary, bucket_size in [
+            (59.9999996, 60, "minute"),
+            (86399.9999999, 86400, "day"),
+            (1000000000.9999996, 1000000001, "second"),
+        ]:
+            self.assertEqual(
+                make_timebucket_id(log_id, boundary, bucket_size),
+                make_timebucket_id(log_id, timestamp, bucket_size),
+            )
+            self.assertEqual(
+                datetime.datetime.fromtimestamp(boundary, datetime.timezone.utc),
+                bucket_starts(timestamp, bucket_size),
+            )
+
+        # Check timestamps a microsecond before a boundary are not.
+        self.assertEqual(
+            datetime.datetime(1970, 1, 1, 0, 0, tzinfo=datetime.timezone.utc),
+            bucket_starts(59.999999, "minute"),
+        )
 
 class TestLogWithCassandra(WithCassandraRecordManagers, TimebucketedlogTestCase):
     pass